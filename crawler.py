@@ -0,0 +1,167 @@
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from typing import Iterable, Iterator, Optional
+import hashlib
+import os
+import queue
+import threading
+import requests
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", "8"))
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+REQUEST_TIMEOUT = 30
+
+
+def find_content_area(soup):
+    """The element holding a guideline page's text."""
+    return soup.find("main") or soup.find("div", class_="contentArea") or soup
+
+
+def content_hash(html: str) -> str:
+    """Hash of the visible text of the content area, ignoring markup-only changes."""
+    text = find_content_area(BeautifulSoup(html, "html.parser")).get_text(" ", strip=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def needs_browser(html: str) -> bool:
+    """True when the static HTML has no readable content and must be rendered."""
+    content_area = find_content_area(BeautifulSoup(html, "html.parser"))
+    return not any(el.get_text(strip=True) for el in content_area.find_all(["p", "li"]))
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: Optional[str]
+    content_hash: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    unchanged: bool = False
+    via: str = "http"
+
+
+class BrowserPool:
+    """Lazily started headless Chrome instances shared across fetches."""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE):
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._driver_path = None
+
+    def _create(self):
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        # Resolve the driver binary once, not per page
+        if self._driver_path is None:
+            self._driver_path = ChromeDriverManager().install()
+        return webdriver.Chrome(service=Service(self._driver_path), options=options)
+
+    @contextmanager
+    def driver(self):
+        """Borrow a browser, starting one if the pool is not full yet."""
+        driver = None
+        with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                driver = self._create()
+                self._created += 1
+        if driver is None:
+            driver = self._idle.get()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def get_html(self, url: str) -> str:
+        with self.driver() as driver:
+            driver.get(url)
+            return driver.page_source
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get().quit()
+        self._created = 0
+
+
+class Crawler:
+    """
+    Fetch pages over a pooled HTTP session, falling back to a browser only
+    for pages whose content is rendered client-side.
+
+    Requests carry If-None-Match/If-Modified-Since from the previous crawl;
+    a 304, or a body whose content hash matches the previous one, is
+    reported as unchanged so callers can skip re-processing the page.
+    """
+
+    def __init__(self, concurrency: int = CRAWL_CONCURRENCY, browser_pool: Optional[BrowserPool] = None):
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.browser_pool = browser_pool or BrowserPool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+        self.browser_pool.close()
+
+    def fetch(self, url: str, previous: Optional[dict] = None) -> FetchResult:
+        """Fetch one page; `previous` holds the etag, last_modified and hash of the last crawl."""
+        previous = previous or {}
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304:
+            logger.info(f"Not modified: {url}")
+            return FetchResult(url, None, previous.get("hash"), previous.get("etag"), previous.get("last_modified"), unchanged=True)
+        response.raise_for_status()
+
+        html = response.text
+        via = "http"
+        if needs_browser(html):
+            logger.info(f"No static content, rendering in browser: {url}")
+            html = self.browser_pool.get_html(url)
+            via = "browser"
+
+        page_hash = content_hash(html)
+        return FetchResult(
+            url,
+            html,
+            page_hash,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            unchanged=page_hash == previous.get("hash"),
+            via=via,
+        )
+
+    def crawl(self, urls: Iterable[str], previous: Optional[dict] = None) -> Iterator[FetchResult]:
+        """Fetch pages concurrently, yielding results as they complete. Failed pages are logged and skipped."""
+        previous = previous or {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawl") as executor:
+            futures = {executor.submit(self.fetch, url, previous.get(url)): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.error(f"Failed to fetch {futures[future]}: {e}")
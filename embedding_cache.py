@@ -0,0 +1,155 @@
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from typing import List, Optional
+import numpy as np
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Cache location and size bound; set EMBEDDING_CACHE_PATH="" to disable caching
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", ".embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a text, used as the content part of the cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap an Embeddings object with a persistent SQLite cache.
+
+    Entries are keyed by (model name, sha256 of text) so the same text is
+    only ever embedded once per model, across ingestion runs and user
+    queries alike. Only cache misses are sent to the underlying model, in
+    a single batch. The cache is bounded by `max_entries` and evicts the
+    least recently used rows.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, path: str, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, last_access REAL NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters since this wrapper was created."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _lookup(self, hashes: List[str]) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = self._conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                [self.model_name, *batch],
+            ).fetchall()
+            for hash_, blob in rows:
+                found[hash_] = np.frombuffer(blob, dtype=np.float32).tolist()
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND hash = ?",
+                [(now, self.model_name, hash_) for hash_ in found],
+            )
+        return found
+
+    def _store(self, entries: dict) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_access) VALUES (?, ?, ?, ?)",
+            [(self.model_name, hash_, np.asarray(vector, dtype=np.float32).tobytes(), now) for hash_, vector in entries.items()],
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
+            logger.info(f"Evicted {excess} least recently used embeddings from cache")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        with self._lock:
+            cached = self._lookup(hashes)
+            self._conn.commit()
+            miss_count = sum(1 for hash_ in hashes if hash_ not in cached)
+            self.hits += len(hashes) - miss_count
+            self.misses += miss_count
+
+        # Embed each distinct missing text once, in one batch
+        missing = {}
+        for hash_, text in zip(hashes, texts):
+            if hash_ not in cached and hash_ not in missing:
+                missing[hash_] = text
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+                self._conn.commit()
+            cached.update(computed)
+
+        return [list(cached[hash_]) for hash_ in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        hash_ = text_hash(text)
+        with self._lock:
+            cached = self._lookup([hash_])
+            self._conn.commit()
+            if hash_ in cached:
+                self.hits += 1
+                return cached[hash_]
+            self.misses += 1
+
+        vector = self.underlying.embed_query(text)
+        with self._lock:
+            self._store({hash_: vector})
+            self._conn.commit()
+        return vector
+
+
+def get_embeddings(model: str = EMBEDDING_MODEL, cache_path: Optional[str] = None) -> Embeddings:
+    """Create the OpenAI embeddings used by ingestion and retrieval, wrapped in the on-disk cache."""
+    embeddings = OpenAIEmbeddings(model=model)
+    cache_path = EMBEDDING_CACHE_PATH if cache_path is None else cache_path
+    if not cache_path:
+        return embeddings
+    return CachedEmbeddings(embeddings, model_name=model, path=cache_path)
@@ -2,17 +2,16 @@
 from bs4 import BeautifulSoup
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone, ServerlessSpec
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from crawler import Crawler, find_content_area
+from embedding_cache import get_embeddings, text_hash
+from local_store import LocalVectorStore, local_index_path, use_local_backend
+from manifest import IngestManifest
+from pipeline import IngestionPipeline, vector_writer
 import logging
 import os
-import requests
 import time
-import uuid
 from dotenv import load_dotenv
 
 # Configure logging
@@ -25,9 +24,17 @@ load_dotenv()
 PINECONE_REGION = os.environ["PINECONE_ENVIRONMENT"]
 EDITORIAL_INDEX_NAME = os.environ["INDEX_GUIDELINE"]
 
+# Per-page content hash, HTTP validators and chunk ids from the last crawl
+GUIDELINE_MANIFEST_PATH = os.environ.get("GUIDELINE_MANIFEST_PATH", f"manifests/{EDITORIAL_INDEX_NAME}.json")
+
 def initialize_vector_store():
-    """Initialize or connect to the Pinecone vector store."""
+    """Initialize or connect to the vector store for the configured backend."""
     try:
+        if use_local_backend():
+            embeddings = get_embeddings()
+            logger.info("Local vector store initialized")
+            return LocalVectorStore.load(local_index_path(EDITORIAL_INDEX_NAME), embeddings)
+
         pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
         existing_indexes = [index_info["name"] for index_info in pc.list_indexes()]
         
@@ -44,7 +51,7 @@ def initialize_vector_store():
                 logger.info(f"Waiting for index {EDITORIAL_INDEX_NAME} to be ready...")
                 time.sleep(2)
         
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        embeddings = get_embeddings()
         vector_store = PineconeVectorStore.from_existing_index(
             index_name=EDITORIAL_INDEX_NAME,
             embedding=embeddings
@@ -55,93 +62,98 @@ def initialize_vector_store():
         logger.error(f"Error initializing vector store: {e}")
         raise
 
-def get_dynamic_html(url):
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.get(url)
-    html = driver.page_source
-    driver.quit()
-    return html
-
-def process_webpage(url, vector_store):
-    """Extract, chunk, embed and store webpage content in Pinecone."""
-    try:
-        response = requests.get(url)
-        html = get_dynamic_html(url)
-        soup = BeautifulSoup(html, "html.parser")
-
-
-        content_area = soup.find("main") or soup.find("div", class_="contentArea") or soup
-        if not content_area:
-            logger.warning("Main content not found")
-            return
-
-        documents = []
-        elements = content_area.find_all(["h1", "h2", "h3", "p", "li"])
-        current_section = None
-        section_content = []
-
-        for el in elements:
-            if el.name in ["h1", "h2", "h3"]:
-                # Save previous section
-                if current_section and section_content:
-                    content = " ".join(section_content).strip()
-                    if content:
-                        documents.append(
-                            Document(
-                                page_content=content,
-                                metadata={
-                                    "doc_id": str(uuid.uuid4()),
-                                    "section_title": current_section,
-                                    "source_url": url,
-                                    "document_type": "editorial_guideline"
-                                }
-                            )
-                        )
-                        logger.info(f"Processed section: {current_section}")
-                    section_content = []
-                current_section = el.get_text(strip=True)
-
-            elif el.name in ["p", "li"]:
-                text = el.get_text(strip=True)
-                if text:
-                    section_content.append(text)
-
-        # Save last section
-        if current_section and section_content:
-            content = " ".join(section_content).strip()
-            if content:
-                documents.append(
-                    Document(
-                        page_content=content,
-                        metadata={
-                            "doc_id": str(uuid.uuid4()),
-                            "section_title": current_section,
-                            "source_url": url,
-                            "document_type": "editorial_guideline"
-                        }
-                    )
+def section_id(url, ordinal, title):
+    """Stable id of a page section, so a re-crawl overwrites instead of duplicating."""
+    return text_hash(f"{url}#{ordinal}#{title}")[:16]
+
+def parse_sections(html, url):
+    """Split a guideline page into one Document per h1/h2/h3 section."""
+    soup = BeautifulSoup(html, "html.parser")
+    content_area = find_content_area(soup)
+    if not content_area:
+        logger.warning("Main content not found")
+        return []
+
+    documents = []
+    elements = content_area.find_all(["h1", "h2", "h3", "p", "li"])
+    current_section = None
+    section_content = []
+
+    def save_section():
+        content = " ".join(section_content).strip()
+        if current_section and content:
+            documents.append(
+                Document(
+                    page_content=content,
+                    metadata={
+                        "doc_id": section_id(url, len(documents), current_section),
+                        "section_title": current_section,
+                        "source_url": url,
+                        "document_type": "editorial_guideline"
+                    }
                 )
+            )
+            logger.info(f"Processed section: {current_section}")
+
+    for el in elements:
+        if el.name in ["h1", "h2", "h3"]:
+            # Save previous section
+            save_section()
+            section_content = []
+            current_section = el.get_text(strip=True)
+
+        elif el.name in ["p", "li"]:
+            text = el.get_text(strip=True)
+            if text:
+                section_content.append(text)
+
+    # Save last section
+    save_section()
+    return documents
+
+def process_webpage(url, vector_store, pipeline=None, html=None):
+    """Extract, chunk, embed and store webpage content in the vector store.
+
+    When a shared IngestionPipeline is given the chunks are queued on it;
+    otherwise they are embedded and upserted before returning. Returns the
+    ids of the chunks written for the page.
+    """
+    try:
+        if html is None:
+            with Crawler(concurrency=1) as crawler:
+                html = crawler.fetch(url).html
 
+        documents = parse_sections(html, url)
         if not documents:
             logger.warning("No valid sections extracted")
-            return
+            return []
 
         # Chunk & embed
         splitter = RecursiveCharacterTextSplitter(chunk_size=5000, chunk_overlap=100)
-        chunks = splitter.split_documents(documents)
-
-        logger.info(f"Uploading {len(chunks)} chunks to Pinecone index '{EDITORIAL_INDEX_NAME}'...")
-        vector_store.add_documents(chunks)
+        ids, texts, metadatas = [], [], []
+        for document in documents:
+            for ordinal, chunk in enumerate(splitter.split_text(document.page_content)):
+                ids.append(f"{document.metadata['doc_id']}#{ordinal}")
+                texts.append(chunk)
+                metadatas.append(dict(document.metadata))
+
+        logger.info(f"Uploading {len(ids)} chunks to index '{EDITORIAL_INDEX_NAME}'...")
+        if pipeline is not None:
+            pipeline.submit(ids, texts, metadatas)
+            logger.info("Chunks queued for upload.")
+            return ids
+        with IngestionPipeline(vector_store.embeddings, vector_writer(vector_store)) as own_pipeline:
+            own_pipeline.submit(ids, texts, metadatas)
+        if isinstance(vector_store, LocalVectorStore):
+            vector_store.save()
         logger.info("Upload complete.")
+        return ids
     except Exception as e:
         logger.error(f"Error processing webpage: {e}")
         raise
 
-def process_editorial_data_from_file(file_path):
-    """Process multiple editorial guideline pages from a file of URLs."""
+def process_editorial_data_from_file(file_path, manifest_path=None):
+    """Crawl the guideline pages listed in a file and sync changed pages into the vector store."""
     try:
         with open(file_path, "r") as f:
             urls = list({line.strip() for line in f if line.strip()})
@@ -159,15 +171,36 @@ def process_editorial_data_from_file(file_path):
     print(f"[INFO] Found {len(urls)} URLs to process.")
 
     vector_store = initialize_vector_store()
-
-    for i, url in enumerate(urls, start=1):
-        print(f"\n[{i}/{len(urls)}] Processing URL: {url}")
-        try:
-            process_webpage(url, vector_store)
-            print(f"[SUCCESS] Finished processing: {url}")
-        except Exception as e:
-            logger.error(f"Failed to process {url}: {e}")
-            print(f"[ERROR] Failed to process {url}: {e}")
+    manifest = IngestManifest.load(manifest_path or GUIDELINE_MANIFEST_PATH)
+    stale_ids = []
+
+    # Pages are fetched concurrently; embedding and upserting overlap with the crawl
+    with Crawler() as crawler, IngestionPipeline(vector_store.embeddings, vector_writer(vector_store)) as pipeline:
+        for i, result in enumerate(crawler.crawl(urls, previous=manifest.entries), start=1):
+            url = result.url
+            if result.unchanged:
+                print(f"\n[{i}/{len(urls)}] Unchanged, skipping: {url}")
+                continue
+            print(f"\n[{i}/{len(urls)}] Processing URL ({result.via}): {url}")
+            try:
+                chunk_ids = process_webpage(url, vector_store, pipeline=pipeline, html=result.html)
+                stale_ids.extend(manifest.update(url, result.content_hash, chunk_ids, etag=result.etag, last_modified=result.last_modified))
+                print(f"[SUCCESS] Finished processing: {url}")
+            except Exception as e:
+                logger.error(f"Failed to process {url}: {e}")
+                print(f"[ERROR] Failed to process {url}: {e}")
+
+    # Pages dropped from the URL file lose all their chunks
+    for url in manifest.keys() - set(urls):
+        logger.info(f"Removing chunks of page no longer listed: {url}")
+        stale_ids.extend(manifest.remove(url))
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.save()
+    manifest.save()
+    logger.info(f"Pipeline stages: {pipeline.summary()}")
 
 
 
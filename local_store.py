@@ -0,0 +1,223 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+import numpy as np
+import json
+import os
+import uuid
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Backend selection: "pinecone" (default) or "local"
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "pinecone").lower()
+LOCAL_INDEX_DIR = os.environ.get("LOCAL_INDEX_DIR", "local_index")
+
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.json"
+
+
+def use_local_backend() -> bool:
+    """Return True when the local NumPy backend is selected by config."""
+    return VECTOR_BACKEND == "local"
+
+
+def local_index_path(index_name: str) -> str:
+    """Directory holding the on-disk files of a local index."""
+    return os.path.join(LOCAL_INDEX_DIR, index_name)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store backed by a contiguous float32 matrix.
+
+    Rows are L2-normalised on insert so cosine similarity is a single
+    matrix-vector product. Ids, texts and metadata live in a side table
+    aligned with the matrix rows. The matrix is persisted as a `.npy`
+    file and memory-mapped on load.
+    """
+
+    def __init__(self, embedding: Embeddings, persist_directory: Optional[str] = None):
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self._vectors = None  # np.ndarray of shape (n, dim), float32
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._id_to_row = {}
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def load(cls, persist_directory: str, embedding: Embeddings, mmap: bool = True) -> "LocalVectorStore":
+        """Load a persisted index; returns an empty store if nothing is on disk yet."""
+        store = cls(embedding=embedding, persist_directory=persist_directory)
+        vectors_path = os.path.join(persist_directory, VECTORS_FILE)
+        records_path = os.path.join(persist_directory, RECORDS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(records_path)):
+            logger.info(f"No local index found at {persist_directory}, starting empty")
+            return store
+
+        with open(records_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        store._vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+        store._ids = records["ids"]
+        store._texts = records["texts"]
+        store._metadatas = records["metadatas"]
+        store._id_to_row = {id_: row for row, id_ in enumerate(store._ids)}
+        logger.info(f"Loaded local index from {persist_directory} ({len(store._ids)} vectors)")
+        return store
+
+    def save(self, persist_directory: Optional[str] = None) -> None:
+        """Write the matrix and side table to disk."""
+        persist_directory = persist_directory or self.persist_directory
+        if not persist_directory:
+            raise ValueError("No persist_directory configured for LocalVectorStore")
+        os.makedirs(persist_directory, exist_ok=True)
+
+        vectors = self._vectors if self._vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        # Write to temp files first so a crash never leaves a half-written index
+        vectors_tmp = os.path.join(persist_directory, VECTORS_FILE + ".tmp")
+        records_tmp = os.path.join(persist_directory, RECORDS_FILE + ".tmp")
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        with open(records_tmp, "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f)
+        os.replace(vectors_tmp, os.path.join(persist_directory, VECTORS_FILE))
+        os.replace(records_tmp, os.path.join(persist_directory, RECORDS_FILE))
+        logger.info(f"Saved local index to {persist_directory} ({len(self._ids)} vectors)")
+
+    def add_vectors(
+        self,
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Insert precomputed vectors; rows with an existing id are overwritten."""
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        if self._vectors is None or len(self._vectors) == 0:
+            base = np.empty((0, matrix.shape[1]), dtype=np.float32)
+        else:
+            # Copy out of the read-only memory map before mutating
+            base = np.array(self._vectors, dtype=np.float32)
+
+        new_rows = []
+        for vector, text, metadata, id_ in zip(matrix, texts, metadatas, ids):
+            row = self._id_to_row.get(id_)
+            if row is not None:
+                base[row] = vector
+                self._texts[row] = text
+                self._metadatas[row] = dict(metadata)
+            else:
+                self._id_to_row[id_] = len(self._ids)
+                new_rows.append(vector)
+                self._ids.append(id_)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+        if new_rows:
+            base = np.vstack([base, np.stack(new_rows)])
+
+        self._vectors = np.ascontiguousarray(base)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas=metadatas, ids=ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete rows by id."""
+        if not ids:
+            return False
+        rows = {self._id_to_row[id_] for id_ in ids if id_ in self._id_to_row}
+        if not rows:
+            return False
+        keep = [row for row in range(len(self._ids)) if row not in rows]
+        self._vectors = np.ascontiguousarray(np.asarray(self._vectors)[keep], dtype=np.float32)
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._id_to_row = {id_: row for row, id_ in enumerate(self._ids)}
+        return True
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        return [self._document(self._id_to_row[id_]) for id_ in ids if id_ in self._id_to_row]
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    def _top_k(self, query_vector: List[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorised cosine top-k over the whole matrix."""
+        if self._vectors is None or len(self._ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        # Clip float32 rounding so relevance scores stay within [0, 1]
+        scores = np.clip(self._vectors @ query, -1.0, 1.0)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # argpartition is O(n); only the k survivors get sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        rows, scores = self._top_k(embedding, k)
+        return [(self._document(int(row)), float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Same scaling as PineconeVectorStore so score thresholds carry over
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding=embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
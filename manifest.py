@@ -0,0 +1,66 @@
+import json
+import os
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class IngestManifest:
+    """
+    Local record of what the last ingestion run upserted.
+
+    Maps a source key (an article's content_id, a guideline page URL, ...)
+    to an entry holding at least its content `hash` and the `chunk_ids`
+    written for it, so a rerun can skip unchanged sources and delete
+    chunks that no longer exist.
+    """
+
+    def __init__(self, path: str, entries: dict = None):
+        self.path = path
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path: str) -> "IngestManifest":
+        """Load a manifest from disk; a missing file yields an empty manifest."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", {})
+            logger.info(f"Loaded manifest {path} with {len(entries)} entries")
+        except FileNotFoundError:
+            logger.info(f"No manifest at {path}, treating every source as new")
+            entries = {}
+        return cls(path, entries)
+
+    def save(self) -> None:
+        """Atomically write the manifest back to disk."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str) -> dict:
+        return self.entries.get(key)
+
+    def is_unchanged(self, key: str, content_hash: str) -> bool:
+        """True when the source was last ingested with exactly this content hash."""
+        entry = self.entries.get(key)
+        return entry is not None and entry.get("hash") == content_hash
+
+    def update(self, key: str, content_hash: str, chunk_ids: list, **extra) -> list:
+        """Record the new chunk ids for a source and return the ids that became stale."""
+        previous = self.entries.get(key, {}).get("chunk_ids", [])
+        self.entries[key] = {"hash": content_hash, "chunk_ids": list(chunk_ids), **extra}
+        current = set(chunk_ids)
+        return [chunk_id for chunk_id in previous if chunk_id not in current]
+
+    def remove(self, key: str) -> list:
+        """Forget a source and return the chunk ids that were written for it."""
+        entry = self.entries.pop(key, None)
+        return entry.get("chunk_ids", []) if entry else []
+
+    def keys(self) -> set:
+        return set(self.entries)
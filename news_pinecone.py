@@ -1,8 +1,11 @@
-from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone, ServerlessSpec
+from embedding_cache import CachedEmbeddings, get_embeddings, text_hash
+from local_store import LocalVectorStore, local_index_path, use_local_backend
+from manifest import IngestManifest
+from pipeline import IngestionPipeline, vector_writer
+from streaming import Throughput, batched, iter_json_array
 import json
 import os
 import time
@@ -20,17 +23,29 @@ load_dotenv()
 PINECONE_ENVIRONMENT = os.environ["PINECONE_ENVIRONMENT"]
 INDEX_NAME = os.environ["INDEX_NEWS"]
 
-# Initialize Pinecone
-try:
-    pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
-    logger.info("Pinecone client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Pinecone client: {str(e)}")
-    raise
+# Record of the articles and chunk ids written by the last run
+NEWS_MANIFEST_PATH = os.environ.get("NEWS_MANIFEST_PATH", f"manifests/{INDEX_NAME}.json")
+
+# Number of chunks embedded and upserted per request
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "100"))
+
+# Initialize Pinecone (skipped when the local backend is selected)
+pc = None
+if not use_local_backend():
+    try:
+        pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+        logger.info("Pinecone client initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize Pinecone client: {str(e)}")
+        raise
 
 def initialize_vector_store():
-    """Initialize the Pinecone vector store."""
+    """Initialize the vector store for the configured backend."""
     try:
+        if use_local_backend():
+            embeddings = get_embeddings()
+            logger.info(f"Local vector store initialized for index: {INDEX_NAME}")
+            return LocalVectorStore.load(local_index_path(INDEX_NAME), embeddings)
         existing_indexes = [index_info["name"] for index_info in pc.list_indexes()]
         if INDEX_NAME not in existing_indexes:
             logger.info(f"Creating new Pinecone index: {INDEX_NAME}")
@@ -47,71 +62,116 @@ def initialize_vector_store():
                 logger.info(f"Waiting for index {INDEX_NAME} to be ready...")
                 time.sleep(1)
         index = pc.Index(INDEX_NAME)
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        embeddings = get_embeddings()
         logger.info(f"Vector store initialized for index: {INDEX_NAME}")
         return PineconeVectorStore(index=index, embedding=embeddings)
     except Exception as e:
         logger.error(f"Failed to initialize vector store: {str(e)}")
         raise
 
-def process_json_file(json_file_path, vector_store):
-    """Process a JSON file, extract text, and add it to the vector store."""
-    try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        logger.info(f"Loaded JSON file: {json_file_path}")
-
-        documents = []
-        for item in data:
-            # Validate required fields
-            if not isinstance(item, dict):
-                logger.warning(f"Skipping invalid item: not a dictionary")
-                continue
-            if "content_id" not in item or not item["content_id"]:
-                logger.warning(f"Skipping item with missing or empty content_id")
-                continue
-            if "content_headline" not in item or not item["content_headline"].strip():
-                logger.warning(f"Skipping item with missing or empty headline: ID={item.get('content_id')}")
-                continue
-            if "body" not in item or not item["body"].strip():
-                logger.warning(f"Skipping item with empty or whitespace-only body: ID={item['content_id']}, Headline='{item['content_headline']}'")
-                continue
-
-            logger.info(f"Processing item: ID={item['content_id']}, Headline='{item['content_headline']}'")
-            # Use only body for initial content
-            content = item["body"]
-            # Create metadata dictionary with safe defaults, including content_headline
-            metadata = {
-                "content_id": item["content_id"],
-                "content_headline": item["content_headline"],
-                "content_type": item.get("content_type", "Unknown"),
-                "content_publish_time": item.get("content_publish_time", ""),
-                "content_last_update": item.get("content_last_update", ""),
-                "content_word_count": item.get("content_word_count", "0"),
-                "content_department_path": item.get("content_department_path", "") if item.get("content_department_path") is not None else "",
-                "content_categories": [cat["content_category"] for cat in item.get("content_categories", []) if isinstance(cat, dict) and "content_category" in cat],
-                "content_tags": [tag["name"] for tag in item.get("content_tags", []) if isinstance(tag, dict) and "name" in tag]
-            }
-            documents.append(Document(page_content=content, metadata=metadata))
-
-        if not documents:
-            logger.warning("No valid documents to process")
-            return
+def article_hash(item, metadata):
+    """Hash of everything that ends up in an article's chunks."""
+    payload = json.dumps({"body": item["body"], "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return text_hash(payload)
+
+def chunk_id(content_id, ordinal, text):
+    """Deterministic chunk id: the same article text always maps to the same ids."""
+    return f"{content_id}#{ordinal}#{text_hash(text)[:16]}"
+
+def iter_valid_articles(items, stats):
+    """Validation stage: yield (item, metadata) for every well-formed article."""
+    for item in items:
+        stats.add("articles_read")
+        # Validate required fields
+        if not isinstance(item, dict):
+            logger.warning(f"Skipping invalid item: not a dictionary")
+            continue
+        if "content_id" not in item or not item["content_id"]:
+            logger.warning(f"Skipping item with missing or empty content_id")
+            continue
+        if "content_headline" not in item or not item["content_headline"].strip():
+            logger.warning(f"Skipping item with missing or empty headline: ID={item.get('content_id')}")
+            continue
+        if "body" not in item or not item["body"].strip():
+            logger.warning(f"Skipping item with empty or whitespace-only body: ID={item['content_id']}, Headline='{item['content_headline']}'")
+            continue
 
+        # Create metadata dictionary with safe defaults, including content_headline
+        metadata = {
+            "content_id": item["content_id"],
+            "content_headline": item["content_headline"],
+            "content_type": item.get("content_type", "Unknown"),
+            "content_publish_time": item.get("content_publish_time", ""),
+            "content_last_update": item.get("content_last_update", ""),
+            "content_word_count": item.get("content_word_count", "0"),
+            "content_department_path": item.get("content_department_path", "") if item.get("content_department_path") is not None else "",
+            "content_categories": [cat["content_category"] for cat in item.get("content_categories", []) if isinstance(cat, dict) and "content_category" in cat],
+            "content_tags": [tag["name"] for tag in item.get("content_tags", []) if isinstance(tag, dict) and "name" in tag]
+        }
+        yield item, metadata
+
+def iter_changed_chunks(articles, manifest, text_splitter, seen_ids, stale_ids, stats):
+    """Split and header-prefix stage: yield (id, text, metadata) for new or changed articles only."""
+    for item, metadata in articles:
+        content_id = metadata["content_id"]
+        seen_ids.add(content_id)
+        content_hash = article_hash(item, metadata)
+        if manifest.is_unchanged(content_id, content_hash):
+            stats.add("articles_unchanged")
+            continue
+
+        logger.info(f"Processing item: ID={content_id}, Headline='{metadata['content_headline']}'")
+        stats.add("articles_changed")
+        # Split only the body, then prepend content_id and content_headline to each chunk
+        article_ids = []
+        for ordinal, chunk in enumerate(text_splitter.split_text(item["body"])):
+            text = f"Content ID: {content_id}\nHeadline: {metadata['content_headline']}\n{chunk}"
+            article_ids.append(chunk_id(content_id, ordinal, text))
+            stats.add("chunks")
+            yield article_ids[-1], text, dict(metadata)
+        stale_ids.extend(manifest.update(content_id, content_hash, article_ids, content_last_update=metadata["content_last_update"]))
+
+def process_json_file(json_file_path, vector_store, manifest_path=None, batch_size=INGEST_BATCH_SIZE):
+    """Stream a JSON array file and upsert new or changed articles into the vector store.
+
+    Articles are parsed, validated, split and upserted in fixed-size batches, so
+    memory stays flat regardless of the dump size. Articles whose content hash
+    matches the manifest are skipped, stale chunks of changed articles and all
+    chunks of removed articles are deleted.
+    """
+    try:
+        logger.info(f"Streaming JSON file: {json_file_path}")
+        manifest = IngestManifest.load(manifest_path or NEWS_MANIFEST_PATH)
         text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
-        split_docs = text_splitter.split_documents(documents)
-        
-        # Modify each chunk to prepend content_id and content_headline
-        modified_docs = []
-        for doc in split_docs:
-            content_id = doc.metadata["content_id"]
-            content_headline = doc.metadata["content_headline"]
-            new_content = f"Content ID: {content_id}\nHeadline: {content_headline}\n{doc.page_content}"
-            modified_docs.append(Document(page_content=new_content, metadata=doc.metadata))
-        
-        logger.info(f"Adding {len(modified_docs)} document chunks to vector store")
-        vector_store.add_documents(modified_docs)
-        logger.info("Finished adding document chunks to vector store")
+        stats = Throughput()
+        seen_ids = set()
+        stale_ids = []
+
+        articles = iter_valid_articles(iter_json_array(json_file_path), stats)
+        chunks = iter_changed_chunks(articles, manifest, text_splitter, seen_ids, stale_ids, stats)
+        # Embedding of one batch overlaps with the upsert of the previous ones
+        with IngestionPipeline(vector_store.embeddings, vector_writer(vector_store)) as pipeline:
+            for batch in batched(chunks, batch_size):
+                ids, texts, metadatas = (list(column) for column in zip(*batch))
+                pipeline.submit(ids, texts, metadatas)
+                logger.info(f"Queued batch of {len(ids)} chunks: {stats.summary()}")
+        stats.add("chunks_upserted", pipeline.stats["upsert"]["items"])
+        logger.info(f"Pipeline stages: {pipeline.summary()}")
+
+        # Articles that disappeared from the dataset lose all their chunks
+        for content_id in manifest.keys() - seen_ids:
+            logger.info(f"Removing chunks of deleted article: ID={content_id}")
+            stale_ids.extend(manifest.remove(content_id))
+        for batch in batched(stale_ids, batch_size):
+            vector_store.delete(ids=batch)
+        stats.add("chunks_deleted", len(stale_ids))
+
+        if isinstance(vector_store, LocalVectorStore):
+            vector_store.save()
+        # Only record the new state once the index reflects it
+        manifest.save()
+        logger.info(f"Finished syncing document chunks to vector store: {stats.summary()}")
+        return stats
     except Exception as e:
         logger.error(f"Error processing JSON file: {str(e)}")
         raise
@@ -122,6 +182,8 @@ def process_news_data(json_file_path):
         vector_store = initialize_vector_store()
         logger.info(f"Processing JSON file: {json_file_path}")
         process_json_file(json_file_path, vector_store)
+        if isinstance(vector_store.embeddings, CachedEmbeddings):
+            logger.info(f"Embedding cache stats: {vector_store.embeddings.stats()}")
         logger.info("Processing complete.")
     except Exception as e:
         logger.error(f"Error in process_news_data: {str(e)}")
@@ -0,0 +1,253 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+from local_store import LocalVectorStore
+from typing import List, Optional
+import os
+import random
+import threading
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Pipeline tuning; rates are requests per second, 0 disables the limiter
+INGEST_CONCURRENCY = int(os.environ.get("INGEST_CONCURRENCY", "4"))
+EMBED_REQUESTS_PER_SECOND = float(os.environ.get("EMBED_REQUESTS_PER_SECOND", "0"))
+UPSERT_REQUESTS_PER_SECOND = float(os.environ.get("UPSERT_REQUESTS_PER_SECOND", "0"))
+INGEST_MAX_RETRIES = int(os.environ.get("INGEST_MAX_RETRIES", "5"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def error_status(exc: Exception) -> Optional[int]:
+    """Best-effort HTTP status of an OpenAI, Pinecone or requests exception."""
+    for attr in ("status_code", "status", "http_status"):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Retry on rate limiting (429), server errors (5xx) and transport failures."""
+    status = error_status(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+class PineconeWriter:
+    """Upsert precomputed vectors into the Pinecone index behind a PineconeVectorStore."""
+
+    def __init__(self, vector_store):
+        self.index = vector_store._index
+        self.namespace = vector_store._namespace
+        self.text_key = vector_store._text_key
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None):
+        metadatas = metadatas or [{} for _ in texts]
+        records = [
+            (id_, list(vector), {**metadata, self.text_key: text})
+            for id_, vector, text, metadata in zip(ids, vectors, texts, metadatas)
+        ]
+        self.index.upsert(vectors=records, namespace=self.namespace)
+        return ids
+
+
+class LockedWriter:
+    """Serialise writes into a store that is not safe for concurrent mutation."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None):
+        with self._lock:
+            return self.store.add_vectors(vectors, texts, metadatas=metadatas, ids=ids)
+
+
+def vector_writer(vector_store):
+    """Return an object with `add_vectors(vectors, texts, metadatas, ids)` for a vector store."""
+    if isinstance(vector_store, LocalVectorStore):
+        return LockedWriter(vector_store)
+    if hasattr(vector_store, "_index") and hasattr(vector_store, "_text_key"):
+        return PineconeWriter(vector_store)
+    if hasattr(vector_store, "add_vectors"):
+        return vector_store
+    raise TypeError(f"No vector writer for {type(vector_store).__name__}")
+
+
+class IngestionPipeline:
+    """
+    Overlap embedding and upserting of chunk batches across worker pools.
+
+    Each submitted batch is embedded on the embed pool and then handed to the
+    upsert pool, so batch N+1 is being embedded while batch N is upserted.
+    At most `max_in_flight` batches are queued or running at once: `submit`
+    blocks beyond that, which bounds memory and applies backpressure to the
+    producer. Both stages go through a token-bucket limiter and retry
+    429/5xx failures with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        writer,
+        concurrency: int = INGEST_CONCURRENCY,
+        max_in_flight: Optional[int] = None,
+        embed_rate: float = EMBED_REQUESTS_PER_SECOND,
+        upsert_rate: float = UPSERT_REQUESTS_PER_SECOND,
+        max_retries: int = INGEST_MAX_RETRIES,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.embeddings = embeddings
+        self.writer = writer
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._embed_limiter = TokenBucket(embed_rate)
+        self._upsert_limiter = TokenBucket(upsert_rate)
+        self._embed_pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+        self._upsert_pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="upsert")
+        self._slots = threading.BoundedSemaphore(max_in_flight or 2 * concurrency)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self._error = None
+        self._start = time.perf_counter()
+        self.stats = {
+            stage: {"batches": 0, "items": 0, "busy_seconds": 0.0, "retries": 0}
+            for stage in ("embed", "upsert")
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(raise_errors=exc_type is None)
+
+    def _call(self, stage: str, limiter: TokenBucket, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            limiter.acquire()
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                with self._lock:
+                    self.stats[stage]["busy_seconds"] += time.perf_counter() - started
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                # Full jitter keeps concurrent workers from retrying in lockstep
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                with self._lock:
+                    self.stats[stage]["retries"] += 1
+                logger.warning(f"{stage} failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _record(self, stage: str, items: int) -> None:
+        with self._lock:
+            self.stats[stage]["batches"] += 1
+            self.stats[stage]["items"] += items
+
+    def _finish(self, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            if error is not None and self._error is None:
+                self._error = error
+            self._pending -= 1
+            self._idle.notify_all()
+        self._slots.release()
+
+    def _embed(self, ids, texts, metadatas) -> None:
+        try:
+            vectors = self._call("embed", self._embed_limiter, self.embeddings.embed_documents, texts)
+            self._record("embed", len(texts))
+            self._upsert_pool.submit(self._upsert, ids, texts, vectors, metadatas)
+        except Exception as e:
+            logger.error(f"Embedding batch failed: {e}")
+            self._finish(e)
+
+    def _upsert(self, ids, texts, vectors, metadatas) -> None:
+        try:
+            self._call("upsert", self._upsert_limiter, self.writer.add_vectors, vectors, texts, metadatas=metadatas, ids=ids)
+            self._record("upsert", len(ids))
+            self._finish()
+        except Exception as e:
+            logger.error(f"Upsert batch failed: {e}")
+            self._finish(e)
+
+    def submit(self, ids: List[str], texts: List[str], metadatas: List[dict]) -> None:
+        """Queue one batch; blocks while `max_in_flight` batches are outstanding."""
+        if self._error is not None:
+            raise self._error
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+        self._embed_pool.submit(self._embed, ids, texts, metadatas)
+
+    def join(self) -> None:
+        """Wait for every submitted batch and re-raise the first failure."""
+        with self._lock:
+            while self._pending:
+                self._idle.wait()
+        if self._error is not None:
+            raise self._error
+
+    def close(self, raise_errors: bool = True) -> None:
+        try:
+            if raise_errors:
+                self.join()
+        finally:
+            self._embed_pool.shutdown(wait=True)
+            self._upsert_pool.shutdown(wait=True)
+
+    def report(self) -> dict:
+        """Per-stage counters plus wall-clock and busy-time throughput."""
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        with self._lock:
+            report = {"elapsed_seconds": elapsed}
+            for stage, stats in self.stats.items():
+                report[stage] = dict(
+                    stats,
+                    items_per_second=stats["items"] / elapsed,
+                    items_per_busy_second=stats["items"] / stats["busy_seconds"] if stats["busy_seconds"] else 0.0,
+                )
+        return report
+
+    def summary(self) -> str:
+        report = self.report()
+        return ", ".join(
+            f"{stage}: {report[stage]['items']} items in {report[stage]['batches']} batches "
+            f"({report[stage]['items_per_second']:.1f}/s, {report[stage]['retries']} retries)"
+            for stage in ("embed", "upsert")
+        )
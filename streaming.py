@@ -0,0 +1,106 @@
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+import json
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(file_path: str, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only the current element and one read buffer are held in memory, so
+    arbitrarily large dumps can be processed with constant memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        eof = False
+        started = False
+
+        def fill():
+            nonlocal buffer, eof
+            data = f.read(read_size)
+            if not data:
+                eof = True
+            buffer += data
+
+        while True:
+            # Skip whitespace and separators between elements
+            pos = 0
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer = ""
+                pos = 0
+                fill()
+            buffer = buffer[pos:]
+
+            if not started:
+                if not buffer.startswith("["):
+                    raise ValueError(f"{file_path} does not contain a top-level JSON array")
+                started = True
+                buffer = buffer[1:]
+                continue
+            if not buffer:
+                raise ValueError(f"Unexpected end of file in {file_path}")
+            if buffer[0] == "]":
+                return
+            if buffer[0] == ",":
+                buffer = buffer[1:]
+                continue
+
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A value ending exactly at the buffer edge may be truncated (e.g. a number)
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            buffer = buffer[end:]
+            yield value
+
+
+def batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Throughput:
+    """Count processed items per kind and report rates since start."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.counts = {}
+
+    def add(self, kind: str, count: int = 1) -> None:
+        self.counts[kind] = self.counts.get(kind, 0) + count
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def rates(self) -> dict:
+        elapsed = max(self.elapsed(), 1e-9)
+        return {kind: count / elapsed for kind, count in self.counts.items()}
+
+    def summary(self) -> str:
+        rates = self.rates()
+        parts = [f"{self.counts[kind]} {kind} ({rates[kind]:.1f}/s)" for kind in self.counts]
+        return f"{', '.join(parts)} in {self.elapsed():.2f}s"
@@ -1,9 +1,10 @@
 from langchain.tools.retriever import create_retriever_tool
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone
+from embedding_cache import get_embeddings
+from local_store import LocalVectorStore, local_index_path, use_local_backend
 import os
 import logging
 from dotenv import load_dotenv
@@ -42,8 +43,14 @@ def get_session_history(session_id: str) -> BaseChatMessageHistory:
         store[session_id] = ChatMessageHistory()
     return store[session_id]
 
-def setup_pinecone_and_tools():
-    """Set up Pinecone vector stores, retrievers, and tools."""
+def setup_vector_stores(embeddings):
+    """Connect to the news and guideline vector stores of the configured backend."""
+    if use_local_backend():
+        # Local NumPy indexes written by the ingestion scripts; no network needed
+        vector_store_news = LocalVectorStore.load(local_index_path(INDEX_NEWS), embeddings)
+        vector_store_guideline = LocalVectorStore.load(local_index_path(INDEX_GUIDELINE), embeddings)
+        return vector_store_news, vector_store_guideline
+
     # Initialize Pinecone
     pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
 
@@ -51,10 +58,15 @@ def setup_pinecone_and_tools():
     index_guideline = pc.Index(INDEX_GUIDELINE)
     index_news = pc.Index(INDEX_NEWS)
 
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-
     vector_store_news = PineconeVectorStore(index=index_news, embedding=embeddings)
     vector_store_guideline = PineconeVectorStore(index=index_guideline, embedding=embeddings)
+    return vector_store_news, vector_store_guideline
+
+def setup_pinecone_and_tools():
+    """Set up vector stores, retrievers, and tools."""
+    embeddings = get_embeddings()
+
+    vector_store_news, vector_store_guideline = setup_vector_stores(embeddings)
 
     # Define retrievers
     retriever_news = vector_store_news.as_retriever(